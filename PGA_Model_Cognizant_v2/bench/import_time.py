@@ -0,0 +1,73 @@
+"""Cold-start import benchmark for the pga_model CLI.
+
+Runs `python -X importtime` in fresh interpreters and reads the cumulative import
+time of the target module (interpreter startup such as `site` is reported but not
+judged). Fails if the best run exceeds the target or a heavy module
+(pandas/numpy/requests/yaml/openpyxl) is loaded at startup.
+
+    python bench/import_time.py [--target-ms 30] [--runs 5] [--target pga_model.main]
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = ["pandas", "numpy", "requests", "yaml", "openpyxl"]
+TARGET_MS = 30.0
+
+def _parse(stderr: str) -> tuple[float, dict[str, float]]:
+    # Lines look like "import time:  self [us] | cumulative | <indent>module";
+    # returns (interpreter total ms over top-level imports, {module: cumulative ms})
+    total_us = 0
+    modules: dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cum) / 1000.0
+        if not name[1:].startswith(" "):
+            total_us += int(cum)
+    return total_us / 1000.0, modules
+
+def measure(target: str) -> tuple[float, float, dict[str, float]]:
+    env = dict(os.environ, PYTHONPATH=str(ROOT / "src"))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr)
+    total, modules = _parse(proc.stderr)
+    return modules.get(target, 0.0), total, modules
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--target", default="pga_model.main", help="module to import")
+    ap.add_argument("--target-ms", type=float, default=TARGET_MS)
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    results = [measure(args.target) for _ in range(max(1, args.runs))]
+    times = [t for t, _, _ in results]
+    best, total, modules = min(results, key=lambda r: r[0])
+
+    print(f"import {args.target}: best {best:.1f} ms | median {statistics.median(times):.1f} ms | target {args.target_ms:.0f} ms")
+    print(f"  (all top-level imports incl. site: {total:.1f} ms)")
+    ours = sorted(((ms, m) for m, ms in modules.items() if m.startswith("pga_model")), reverse=True)
+    for ms, m in ours[:10]:
+        print(f"  {ms:8.1f} ms  {m}")
+
+    heavy = [m for m in HEAVY if m in modules]
+    ok = best <= args.target_ms and not heavy
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+    elif best > args.target_ms:
+        print("FAIL: cold start over target")
+    else:
+        print("PASS")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
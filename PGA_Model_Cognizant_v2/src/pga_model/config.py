@@ -0,0 +1,83 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from .report.logging import load_yaml
+
+MODEL_PATH = "config/model.yaml"
+DATAGOLF_PATH = "config/datagolf.yaml"
+
+class ConfigError(ValueError):
+    pass
+
+def _freeze(obj: Any) -> Any:
+    if isinstance(obj, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+def thaw(obj: Any) -> Any:
+    # Plain dict/list copy of a frozen section (for json dumps or local edits)
+    if isinstance(obj, Mapping):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return [thaw(v) for v in obj]
+    return obj
+
+def _merge(base: dict, updates: Mapping) -> dict:
+    for k, v in updates.items():
+        if isinstance(v, Mapping) and isinstance(base.get(k), dict):
+            _merge(base[k], v)
+        else:
+            base[k] = thaw(v)
+    return base
+
+def _require(section: Mapping, path: str, numeric: bool = True) -> None:
+    node: Any = section
+    for part in path.split("."):
+        if not isinstance(node, Mapping) or part not in node:
+            raise ConfigError(f"Missing config key: {path}")
+        node = node[part]
+    if numeric:
+        try:
+            float(node)
+        except (TypeError, ValueError):
+            raise ConfigError(f"Config key {path} must be numeric, got {node!r}")
+
+def _validate(model: Mapping, datagolf: Mapping) -> None:
+    for path in ["sg_blend.l24_weight", "sg_blend.l8_weight",
+                 "sim.n_sims", "sim.seed",
+                 "projection.approach.distance_weights.150_200",
+                 "projection.approach.distance_weights.200_plus",
+                 "projection.approach.period_blend.l24",
+                 "projection.approach.period_blend.l12"]:
+        _require(model, path)
+    weights = model["projection"].get("weights")
+    if not isinstance(weights, Mapping) or not weights:
+        raise ConfigError("Missing config key: projection.weights")
+    for k in weights:
+        _require(weights, str(k))
+
+    _require(datagolf, "base_url", numeric=False)
+    if not isinstance(datagolf.get("endpoints"), Mapping) or not datagolf["endpoints"]:
+        raise ConfigError("Missing config key: endpoints")
+
+@dataclass(frozen=True)
+class Config:
+    # Both YAML configs, validated once at startup and passed through the pipeline.
+    model: Mapping[str, Any]
+    datagolf: Mapping[str, Any]
+
+    def with_overrides(self, model: Mapping | None = None) -> "Config":
+        # New Config with `model` deep-merged over the model section
+        if not model:
+            return self
+        return Config(model=_freeze(_merge(thaw(self.model), model)), datagolf=self.datagolf)
+
+def load_config(model_path: str = MODEL_PATH, datagolf_path: str = DATAGOLF_PATH) -> Config:
+    model = load_yaml(model_path)
+    datagolf = load_yaml(datagolf_path)
+    _validate(model, datagolf)
+    return Config(model=_freeze(model), datagolf=_freeze(datagolf))
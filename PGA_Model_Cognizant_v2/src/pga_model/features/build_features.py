@@ -1,17 +1,11 @@
 from __future__ import annotations
 import pandas as pd
 import numpy as np
-import re
 
 from .l24_l8_blend import blend as blend_sg, SG_COLS
-from .course_history import extract_course_history
-from .similar_courses import compute_course_fit
-
-def _norm(name: str) -> str:
-    name=(name or "").lower().strip()
-    name=re.sub(r"[^a-z\s\-']", "", name)
-    name=re.sub(r"\s+"," ",name)
-    return name
+from .course_history import extract_course_history, store_course_history, RoundStore
+from .similar_courses import compute_course_fit, player_profiles
+from .names import norm_name
 
 def _players(payload: dict) -> list[dict]:
     if isinstance(payload, dict):
@@ -26,7 +20,7 @@ def _extract_approach(payload: dict) -> pd.DataFrame:
         name = p.get("player_name") or p.get("name") or p.get("player") or ""
         if not name: 
             continue
-        row={"name_norm": _norm(name)}
+        row={"name_norm": norm_name(name)}
         # Try common DG bucket keys (varies by schema). We look for 150-200 and 200+ equivalents.
         # Accept either structured buckets or flat keys.
         buckets = p.get("distance_buckets") or p.get("buckets")
@@ -79,9 +73,10 @@ def _poor_avoid_value(ap_df: pd.DataFrame) -> pd.Series:
 
 def build_features(players: list[dict], skill_l24: dict, skill_l8: dict|None, decomp: dict|None,
                    approach_l24: dict|None, approach_l12: dict|None,
-                   cfg: dict) -> pd.DataFrame:
+                   cfg: dict, course_demand: np.ndarray|None=None,
+                   history: RoundStore|None=None, course: str|None=None, as_of: str|None=None) -> pd.DataFrame:
     df=pd.DataFrame(players)
-    df["name_norm"]=df["Player"].apply(_norm)
+    df["name_norm"]=df["Player"].apply(norm_name)
 
     # SG blend
     sg=blend_sg(skill_l24, skill_l8, cfg["sg_blend"]["l24_weight"], cfg["sg_blend"]["l8_weight"])
@@ -95,7 +90,7 @@ def build_features(players: list[dict], skill_l24: dict, skill_l8: dict|None, de
         if not dp.empty:
             if "player_name" in dp.columns and "Player" not in dp.columns:
                 dp["Player"]=dp["player_name"]
-            dp["name_norm"]=dp["Player"].apply(_norm)
+            dp["name_norm"]=dp["Player"].apply(norm_name)
             for cand in ["std_dev","std_deviation","round_std_dev"]:
                 if cand in dp.columns:
                     df=df.merge(dp[["name_norm",cand]].rename(columns={cand:"STD_DEV"}), on="name_norm", how="left", suffixes=("","_y"))
@@ -109,13 +104,23 @@ def build_features(players: list[dict], skill_l24: dict, skill_l8: dict|None, de
                     if "BIG_NUM_y" in df.columns: df=df.drop(columns=["BIG_NUM_y"])
                     break
 
-    # Course history
-    ch=extract_course_history(decomp)
-    df=df.merge(ch, on="name_norm", how="left")
-    if "COURSE_HISTORY" not in df.columns: df["COURSE_HISTORY"]=np.nan
-
-    # Course fit placeholder
-    df["COURSE_FIT"]=compute_course_fit(df)
+    # Course history: round-level store when it covers this course, else the decomp payload scalar
+    chc=cfg.get("course_history", {}) or {}
+    if history is not None and course and history.has_course(course):
+        df["COURSE_HISTORY"]=store_course_history(df, history, course, as_of,
+                                                  min_rounds=int(chc.get("min_rounds", 4)),
+                                                  recency_decay=float(chc.get("recency_decay", 0.9)),
+                                                  shrink_rounds=float(chc.get("shrink_rounds", 40)))
+    else:
+        ch=extract_course_history(decomp)
+        df=df.merge(ch, on="name_norm", how="left")
+        if "COURSE_HISTORY" not in df.columns: df["COURSE_HISTORY"]=np.nan
+        # players missing from a partially covered payload are neutral rather than NaN
+        if df["COURSE_HISTORY"].notna().any(): df["COURSE_HISTORY"]=df["COURSE_HISTORY"].fillna(0.0)
+
+    # Course fit: field profiles . course demand profile (zeros when the course isn't indexed)
+    profiles=player_profiles(skill_l24, approach_l24 or approach_l12) if course_demand is not None else None
+    df["COURSE_FIT"]=compute_course_fit(df, profiles, course_demand)
 
     # Approach skill (DataGolf-compliant): blend l24 + l12, then distance weight 150-200 vs 200+
     df["APPROACH_WEIGHTED"]=np.nan
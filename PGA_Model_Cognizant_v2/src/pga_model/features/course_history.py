@@ -1,13 +1,14 @@
 from __future__ import annotations
+from datetime import date
+from pathlib import Path
+import json
+import time
 import pandas as pd
 import numpy as np
-import re
 
-def _norm(name: str) -> str:
-    name=(name or "").lower().strip()
-    name=re.sub(r"[^a-z\s\-']", "", name)
-    name=re.sub(r"\s+"," ",name)
-    return name
+from ..fetch.cache import scan_raw
+from ..report.logging import log
+from .names import norm_name, course_key
 
 def extract_course_history(decomp_payload: dict | None) -> pd.DataFrame:
     if not decomp_payload:
@@ -27,9 +28,214 @@ def extract_course_history(decomp_payload: dict | None) -> pd.DataFrame:
         name=p.get("player_name") or p.get("name") or p.get("player") or ""
         if not name: continue
         ch=None
-        for cand in ["course_history_adj","course_history","course_hist","ch_adj"]:
+        for cand in ["total_course_history_adjustment","course_history_adjustment","course_history_adj","course_history","course_hist","ch_adj"]:
             if cand in p and p[cand] is not None:
                 try: ch=float(p[cand]); break
                 except: pass
-        rows.append({"name_norm": _norm(name), "COURSE_HISTORY": np.nan if ch is None else ch})
+        rows.append({"name_norm": norm_name(name), "COURSE_HISTORY": np.nan if ch is None else ch})
     return pd.DataFrame(rows)
+
+# Round-level course-history store: columnar arrays sorted by (course, dg_id, date)
+# so a whole field resolves with searchsorted + prefix sums, independent of store size.
+
+STORE_PATH = Path("data/index/course_rounds.npz")
+_DATE_BITS = 20  # dates are days since 1970-01-01; key = dg_id << 20 | date
+_EPOCH = date(1970, 1, 1)
+# a past season the API had no rounds for (or couldn't be reached) is retried after this
+MISSING_SEASON_TTL = 7 * 24 * 3600
+
+def _days(d: str | None) -> int | None:
+    try:
+        return (date.fromisoformat(str(d)[:10]) - _EPOCH).days
+    except (TypeError, ValueError):
+        return None
+
+class RoundStore:
+    def __init__(self, dg_id=None, course=None, day=None, rnd=None, sg=None,
+                 courses=None, names=None, sources=None, seasons=None):
+        self.dg_id = np.asarray(dg_id if dg_id is not None else [], dtype=np.int64)
+        self.course = np.asarray(course if course is not None else [], dtype=np.int32)
+        self.day = np.asarray(day if day is not None else [], dtype=np.int32)
+        self.rnd = np.asarray(rnd if rnd is not None else [], dtype=np.int8)
+        self.sg = np.asarray(sg if sg is not None else [], dtype=float)
+        self.courses: list[str] = list(courses or [])   # code -> course key
+        self.names: dict[str, int] = dict(names or {})  # name_norm -> dg_id
+        self.sources: dict[str, float] = dict(sources or {})
+        self.seasons: dict[str, list] = dict(seasons or {})  # "event_id|year" -> [fetched at, ok]
+        self._reindex()
+
+    def __len__(self) -> int:
+        return len(self.sg)
+
+    def _reindex(self) -> None:
+        self._key = (self.dg_id << _DATE_BITS) | self.day.astype(np.int64)
+        self._course_codes = {c: i for i, c in enumerate(self.courses)}
+
+    @classmethod
+    def load(cls, path: Path = STORE_PATH) -> "RoundStore":
+        if not path.exists():
+            return cls()
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            return cls(z["dg_id"], z["course"], z["day"], z["rnd"], z["sg"],
+                       meta["courses"], meta["names"], meta["sources"], meta.get("seasons"))
+
+    def save(self, path: Path = STORE_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = json.dumps({"courses": self.courses, "names": self.names, "sources": self.sources,
+                           "seasons": self.seasons})
+        with open(path, "wb") as f:
+            np.savez(f, dg_id=self.dg_id, course=self.course, day=self.day, rnd=self.rnd, sg=self.sg,
+                     meta=np.array(meta))
+
+    def append(self, rows: list[dict]) -> int:
+        # rows: {dg_id, course, day (days since epoch), round, sg}; a re-ingested round replaces the old value
+        if not rows:
+            return 0
+        for r in rows:
+            ck = course_key(r["course"])
+            if ck not in self._course_codes:
+                self._course_codes[ck] = len(self.courses)
+                self.courses.append(ck)
+        dg_id = np.concatenate([self.dg_id, np.array([r["dg_id"] for r in rows], dtype=np.int64)])
+        course = np.concatenate([self.course, np.array([self._course_codes[course_key(r["course"])] for r in rows], dtype=np.int32)])
+        day = np.concatenate([self.day, np.array([r["day"] for r in rows], dtype=np.int32)])
+        rnd = np.concatenate([self.rnd, np.array([r["round"] for r in rows], dtype=np.int8)])
+        sg = np.concatenate([self.sg, np.array([r["sg"] for r in rows], dtype=float)])
+
+        # stable sort keeps later (newer) rows after older duplicates; keep the last of each
+        order = np.lexsort((rnd, day, dg_id, course))
+        dg_id, course, day, rnd, sg = dg_id[order], course[order], day[order], rnd[order], sg[order]
+        last = np.ones(len(sg), dtype=bool)
+        last[:-1] = ((dg_id[1:] != dg_id[:-1]) | (course[1:] != course[:-1]) |
+                     (day[1:] != day[:-1]) | (rnd[1:] != rnd[:-1]))
+        before = len(self)
+        self.dg_id, self.course, self.day, self.rnd, self.sg = dg_id[last], course[last], day[last], rnd[last], sg[last]
+        self._reindex()
+        return len(self) - before
+
+    def has_course(self, course: str) -> bool:
+        code = self._course_codes.get(course_key(course))
+        if code is None or not len(self):
+            return False
+        lo, hi = np.searchsorted(self.course, [code, code + 1])
+        return bool(hi > lo)
+
+    def course_years(self, course: str) -> set[int]:
+        # calendar years with at least one round at `course`
+        code = self._course_codes.get(course_key(course))
+        if code is None or not len(self):
+            return set()
+        lo, hi = np.searchsorted(self.course, [code, code + 1])
+        years = self.day[lo:hi].astype("datetime64[D]").astype("datetime64[Y]").astype(int) + 1970
+        return {int(y) for y in np.unique(years)}
+
+    def seasons_to_fetch(self, event_id: int, course: str, years) -> list[int]:
+        # Past editions still worth requesting: not already in the store for this course,
+        # not fetched before, and not recorded as missing within MISSING_SEASON_TTL
+        have = self.course_years(course)
+        now = time.time()
+        todo = []
+        for y in years:
+            seen = self.seasons.get(f"{int(event_id)}|{int(y)}")
+            if y in have or (seen and (seen[1] or now - seen[0] < MISSING_SEASON_TTL)):
+                continue
+            todo.append(int(y))
+        return todo
+
+    def mark_season(self, event_id: int, year: int, ok: bool) -> None:
+        self.seasons[f"{int(event_id)}|{int(year)}"] = [time.time(), bool(ok)]
+
+    def course_history(self, dg_ids: np.ndarray, course: str, as_of: str | None,
+                       min_rounds: int = 4, recency_decay: float = 0.9) -> tuple[np.ndarray, np.ndarray]:
+        # (recency-decayed mean round SG at `course`, total round weight) for each id;
+        # NaN mean / 0 weight under min_rounds.
+        # Weight per round = recency_decay ** (years before as_of); rounds on/after as_of are excluded.
+        out = np.full(len(dg_ids), np.nan)
+        weight = np.zeros(len(dg_ids))
+        code = self._course_codes.get(course_key(course))
+        if code is None or not len(self):
+            return out, weight
+        lo, hi = np.searchsorted(self.course, [code, code + 1])
+        if lo == hi:
+            return out, weight
+        key = self._key[lo:hi]
+        as_of_day = _days(as_of)
+        if as_of_day is None:
+            as_of_day = int(self.day[lo:hi].max()) + 1
+
+        ok = ~np.isnan(dg_ids)
+        ids = np.where(ok, dg_ids, -1).astype(np.int64)
+        left = np.searchsorted(key, ids << _DATE_BITS, side="left")
+        right = np.searchsorted(key, (ids << _DATE_BITS) | as_of_day, side="left")
+
+        # gather only the field's rows: row j of player i sits at lo + left[i] + j
+        n = right - left
+        grp = np.repeat(np.arange(len(ids)), n)
+        rows = lo + np.repeat(left - (np.cumsum(n) - n), n) + np.arange(int(n.sum()))
+        w = float(recency_decay) ** ((as_of_day - self.day[rows]) / 365.25)
+        wsum = np.bincount(grp, weights=w, minlength=len(ids))
+        wsg = np.bincount(grp, weights=w * self.sg[rows], minlength=len(ids))
+        keep = ok & (n >= int(min_rounds)) & (wsum > 0)
+        out[keep] = wsg[keep] / wsum[keep]
+        weight[keep] = wsum[keep]
+        return out, weight
+
+def _round_rows(payload) -> list[dict] | None:
+    # Rows from a DataGolf historical-raw-data/rounds payload; None for other payloads
+    if not isinstance(payload, dict) or not isinstance(payload.get("scores"), list):
+        return None
+    end = _days(payload.get("event_completed") or payload.get("date"))
+    if end is None:
+        return None
+    rows = []
+    for p in payload["scores"]:
+        if p.get("dg_id") is None:
+            continue
+        for r in range(1, 5):
+            rd = p.get(f"round_{r}")
+            if not isinstance(rd, dict) or not isinstance(rd.get("sg_total"), (int, float)):
+                continue
+            rows.append({
+                "dg_id": int(p["dg_id"]),
+                "name_norm": norm_name(p.get("player_name") or ""),
+                "course": rd.get("course_name") or payload.get("course_name") or "",
+                "day": end - (4 - r),
+                "round": r,
+                "sg": float(rd["sg_total"]),
+            })
+    return rows
+
+def update_history_store(path: Path = STORE_PATH) -> RoundStore:
+    # Append any new/changed round payloads from data/raw; untouched files are skipped.
+    store = RoundStore.load(path)
+    scanned = 0; added = 0
+    for fname, mtime, payload in scan_raw("datagolf", store.sources):
+        store.sources[fname] = mtime
+        scanned += 1
+        rows = _round_rows(payload)
+        if not rows:
+            continue
+        store.names.update({r["name_norm"]: r["dg_id"] for r in rows if r["name_norm"]})
+        added += store.append(rows)
+    if scanned:
+        store.save(path)
+    if added:
+        log(f"Course history store: +{added} rounds ({len(store)} total, {len(store.courses)} courses)")
+    return store
+
+def store_course_history(df: pd.DataFrame, store: RoundStore, course: str, as_of: str | None,
+                         min_rounds: int = 4, recency_decay: float = 0.9, shrink_rounds: float = 40.0) -> pd.Series:
+    # COURSE_HISTORY for the field in one pass: decayed course SG minus current SG_TOTAL,
+    # shrunk toward 0 by wsum / (wsum + shrink_rounds). Single rounds carry ~2.5-3 strokes of
+    # noise, so a handful of rounds only moves a player a little.
+    # Players under min_rounds (or without a rating) get a neutral 0 so the composite stays defined.
+    if "dg_id" in df.columns:
+        ids = pd.to_numeric(df["dg_id"], errors="coerce")
+    else:
+        ids = pd.Series(np.nan, index=df.index)
+    ids = ids.fillna(df["name_norm"].map(store.names)).to_numpy(dtype=float)
+    hist, wsum = store.course_history(ids, course, as_of, min_rounds=min_rounds, recency_decay=recency_decay)
+    base = df["SG_TOTAL"].to_numpy(dtype=float) if "SG_TOTAL" in df.columns else np.zeros(len(df))
+    shrink = np.divide(wsum, wsum + max(float(shrink_rounds), 0.0), out=np.zeros_like(wsum), where=wsum > 0)
+    return pd.Series(np.nan_to_num((hist - base) * shrink, nan=0.0), index=df.index, name="COURSE_HISTORY")
@@ -1,15 +1,10 @@
 from __future__ import annotations
 import pandas as pd
 import numpy as np
-import re
 
-SG_COLS = ["SG_OTT","SG_APP","SG_ARG","SG_PUTT","SG_TOTAL"]
+from .names import norm_name
 
-def _norm(name: str) -> str:
-    name = (name or "").lower().strip()
-    name = re.sub(r"[^a-z\s\-']", "", name)
-    name = re.sub(r"\s+", " ", name)
-    return name
+SG_COLS = ["SG_OTT","SG_APP","SG_ARG","SG_PUTT","SG_TOTAL"]
 
 def _players(payload: dict) -> list[dict]:
     if isinstance(payload, dict):
@@ -25,7 +20,7 @@ def _to_df(payload: dict) -> pd.DataFrame:
         name = p.get("player_name") or p.get("name") or p.get("player") or ""
         if not name: 
             continue
-        row={"name_norm": _norm(name)}
+        row={"name_norm": norm_name(name)}
         # DataGolf skill-ratings commonly exposes sg_* keys; be flexible
         for out, cands in {
             "SG_OTT":["sg_ott","sg_off_tee"],
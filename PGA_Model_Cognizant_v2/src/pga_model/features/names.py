@@ -0,0 +1,13 @@
+from __future__ import annotations
+import re
+
+def norm_name(name: str) -> str:
+    # player-name key shared by every payload join (name_norm)
+    name=(name or "").lower().strip()
+    name=re.sub(r"[^a-z\s\-']", "", name)
+    name=re.sub(r"\s+"," ",name)
+    return name
+
+def course_key(course: str) -> str:
+    # shared key for the course-profile index and the course-history store
+    return re.sub(r"\s+", " ", (course or "").lower().strip())
@@ -1,8 +1,177 @@
 from __future__ import annotations
+from pathlib import Path
+import json
 import pandas as pd
 import numpy as np
 
-def compute_course_fit(df: pd.DataFrame) -> pd.Series:
-    # Placeholder similarity course fit: if you want to add a trait model later, wire here.
-    # For now, return zeros so the pipeline is stable and automation-ready.
-    return pd.Series(np.zeros(len(df)), index=df.index, name="COURSE_FIT")
+from ..fetch.cache import scan_raw
+from ..report.logging import log
+from .names import norm_name, course_key
+
+# Course fit = player profile (z-scored across the field) . course demand profile.
+# Demand profiles are ridge fits of DataGolf's per-player `total_fit_adjustment`
+# on player profiles over past events at the course. Each event is stored with the
+# player profiles snapshotted when it was ingested plus its sufficient statistics
+# (X'X, X'y, n), so new events fold in without refitting or re-profiling old ones.
+# The event being predicted is excluded from its own course profile.
+
+INDEX_PATH = Path("data/index/course_profiles.json")
+INDEX_VERSION = 2
+# a decomposition payload is only profiled with skill ratings from the same week
+MAX_PROFILE_LAG_DAYS = 7
+
+# profile column -> candidate payload keys (skill ratings + approach skill)
+PROFILE_KEYS = {
+    "SG_OTT": ["sg_ott"],
+    "SG_APP": ["sg_app"],
+    "SG_ARG": ["sg_arg"],
+    "SG_PUTT": ["sg_putt"],
+    "DRIVING_DIST": ["driving_dist"],
+    "DRIVING_ACC": ["driving_acc"],
+    "APP_50_100_FW": ["50_100_fw_sg_per_shot"],
+    "APP_100_150_FW": ["100_150_fw_sg_per_shot"],
+    "APP_150_200_FW": ["150_200_fw_sg_per_shot"],
+    "APP_200P_FW": ["over_200_fw_sg_per_shot", "200_plus_fw_sg_per_shot"],
+    "APP_U150_RGH": ["under_150_rgh_sg_per_shot"],
+    "APP_O150_RGH": ["over_150_rgh_sg_per_shot"],
+}
+PROFILE_COLS = list(PROFILE_KEYS)
+
+def _players(payload) -> list[dict]:
+    if isinstance(payload, dict):
+        for k in ["players","data","rankings"]:
+            if isinstance(payload.get(k), list):
+                return payload[k]
+    return payload if isinstance(payload, list) else []
+
+def player_profiles(skill: dict | None, approach: dict | None) -> pd.DataFrame:
+    # One row per player (name_norm) with raw PROFILE_COLS values; NaN where absent
+    rows: dict[str, dict] = {}
+    for payload in [skill, approach]:
+        for p in _players(payload):
+            name = p.get("player_name") or p.get("name") or p.get("player") or ""
+            if not name:
+                continue
+            row = rows.setdefault(norm_name(name), {})
+            for col, cands in PROFILE_KEYS.items():
+                if col in row:
+                    continue
+                for ck in cands:
+                    if isinstance(p.get(ck), (int, float)):
+                        row[col] = float(p[ck]); break
+    df = pd.DataFrame.from_dict(rows, orient="index").reindex(columns=PROFILE_COLS)
+    df.index.name = "name_norm"
+    return df.reset_index()
+
+def _standardize(X: np.ndarray) -> np.ndarray:
+    # column z-scores across the given field; missing values sit at the field mean (0)
+    ok = ~np.isnan(X)
+    cnt = np.maximum(ok.sum(axis=0), 1)
+    m = np.where(ok, X, 0.0).sum(axis=0) / cnt
+    sd = np.sqrt(np.where(ok, (X - m) ** 2, 0.0).sum(axis=0) / cnt)
+    sd = np.where(sd == 0, 1.0, sd)
+    return np.where(ok, (X - m) / sd, 0.0)
+
+def _updated_day(payload) -> float | None:
+    ts = pd.to_datetime(str((payload or {}).get("last_updated") or "").replace("UTC", "").strip(), errors="coerce")
+    return None if pd.isna(ts) else ts.value / 86400e9
+
+def event_key(payload) -> str | None:
+    # "<event name>|<season>" for a player-decompositions payload
+    if not isinstance(payload, dict) or not payload.get("course_name"):
+        return None
+    season = str(payload.get("last_updated") or "")[:4]
+    return f"{payload.get('event_name') or ''}|{season}"
+
+def _decomp_event(payload) -> tuple[str, str, dict[str, float]] | None:
+    # (course, event key, {name_norm: y}) if the payload is a player-decompositions response
+    key = event_key(payload)
+    if key is None:
+        return None
+    ys = {norm_name(p["player_name"]): float(p["total_fit_adjustment"])
+          for p in _players(payload)
+          if p.get("player_name") and isinstance(p.get("total_fit_adjustment"), (int, float))}
+    if not ys:
+        return None
+    return payload["course_name"], key, ys
+
+def load_course_index(path: Path = INDEX_PATH) -> dict:
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION and index.get("features") == PROFILE_COLS:
+            return index
+    return {"version": INDEX_VERSION, "features": PROFILE_COLS, "sources": {}, "courses": {}}
+
+def _event_stats(players: dict[str, dict]) -> dict:
+    names = sorted(players)
+    X = _standardize(np.array([players[n]["x"] for n in names], dtype=float))
+    y = np.array([players[n]["y"] for n in names], dtype=float)
+    return {"n": int(len(y)), "xtx": (X.T @ X).tolist(), "xty": (X.T @ y).tolist()}
+
+def update_course_index(skill: dict | None, approach: dict | None, path: Path = INDEX_PATH) -> dict:
+    # Fold any new/changed decomposition payloads from data/raw into the index.
+    # Players are profiled once, from ratings contemporaneous with the payload; a
+    # re-fetched event keeps the snapshots it already has and only adds new players.
+    index = load_course_index(path)
+    if not skill and not approach:
+        return index
+    skill_day = _updated_day(skill) if skill else _updated_day(approach)
+    prof = None
+    added = 0
+    scanned = 0
+    for fname, mtime, payload in scan_raw("datagolf", index["sources"]):
+        index["sources"][fname] = mtime
+        scanned += 1
+        ev = _decomp_event(payload)
+        if ev is None:
+            continue
+        course, key, ys = ev
+        ev_day = _updated_day(payload)
+        if skill_day is None or ev_day is None or abs(skill_day - ev_day) > MAX_PROFILE_LAG_DAYS:
+            log(f"Course index: skipped {key} (no skill ratings from the same week)")
+            continue
+        if prof is None:
+            prof = player_profiles(skill, approach).set_index("name_norm")
+        entry = index["courses"].setdefault(course_key(course), {"course": course, "events": {}})
+        players = (entry["events"].get(key) or {}).get("players", {})
+        for name, y in ys.items():
+            if name in players:
+                players[name]["y"] = y
+            elif name in prof.index:
+                players[name] = {"x": [None if pd.isna(v) else float(v) for v in prof.loc[name, PROFILE_COLS]], "y": y}
+        if not players:
+            index["sources"].pop(fname)  # retry once profiles cover this field
+            continue
+        entry["events"][key] = {"players": players, **_event_stats(players)}
+        added += 1
+
+    if not scanned:
+        return index
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    if added:
+        log(f"Course index: folded in {added} event(s); {len(index['courses'])} course(s)")
+    return index
+
+def course_profile(index: dict, course: str, ridge: float = 0.1, exclude: str | None = None) -> np.ndarray | None:
+    # Demand vector over PROFILE_COLS (strokes per field-sd of each trait), fitted on
+    # the course's indexed events other than `exclude` (the event being predicted)
+    entry = index.get("courses", {}).get(course_key(course))
+    events = [ev for key, ev in (entry or {}).get("events", {}).items() if key != exclude]
+    if not events:
+        return None
+    k = len(PROFILE_COLS)
+    xtx = np.zeros((k, k)); xty = np.zeros(k); n = 0
+    for ev in events:
+        xtx += np.asarray(ev["xtx"]); xty += np.asarray(ev["xty"]); n += ev["n"]
+    return np.linalg.solve(xtx + ridge * n * np.eye(k), xty)
+
+def compute_course_fit(df: pd.DataFrame, profiles: pd.DataFrame | None = None, demand: np.ndarray | None = None) -> pd.Series:
+    # Without a course profile (unknown course / empty index) fit stays neutral at zero.
+    if demand is None or profiles is None or profiles.empty:
+        return pd.Series(np.zeros(len(df)), index=df.index, name="COURSE_FIT")
+    X = df[["name_norm"]].merge(profiles, on="name_norm", how="left")[PROFILE_COLS].to_numpy(dtype=float)
+    fit = _standardize(X) @ demand
+    return pd.Series(fit, index=df.index, name="COURSE_FIT")
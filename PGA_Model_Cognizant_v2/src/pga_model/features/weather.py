@@ -1,9 +1,226 @@
 from __future__ import annotations
+from datetime import date, timedelta
+from pathlib import Path
+import json
+import re
+import time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import pandas as pd
 import numpy as np
 
-def weather_adjustment(df: pd.DataFrame, cap_abs: float = 0.12) -> pd.Series:
-    # Pre-tournament stub: keep weather overlay deterministic and bounded.
-    # If you later connect a weather client, convert exposure into strokes and clip to cap_abs.
+from ..fetch.cache import cache_read, cache_write
+from ..report.logging import log
+from .names import norm_name, course_key
+
+# Weather overlay: hourly forecast grid per course/window -> per-player wind/rain
+# exposure over their R1/R2 tee-time windows -> field-relative strokes, capped.
+# Grid and tee times are compared in UTC once the event's timezone is known
+# (`weather.timezones` by course, else the timezone the provider reports), with naive
+# stamps read as course-local. Without a timezone only naive stamps are usable.
+
+GRID_KEYS = ["wind_mph", "precip_mm"]
+CACHE_DIR = Path("data/index/weather")
+_EPOCH = pd.Timestamp("1970-01-01")
+
+def _slug(course: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", (course or "").lower()).strip("_")
+
+def _zone(tz) -> str | None:
+    if not tz:
+        return None
+    try:
+        ZoneInfo(str(tz))
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {tz}")
+    return str(tz)
+
+def course_timezone(wcfg: dict, course: str) -> str | None:
+    # IANA timezone for the event course from `weather.timezones` ({course name: tz})
+    zones = {course_key(k): v for k, v in (wcfg.get("timezones", {}) or {}).items()}
+    return _zone(zones.get(course_key(course)))
+
+def _hours(ts, tz: str | None = None) -> np.ndarray:
+    # ISO-ish timestamps -> float hours since epoch (NaN where unparseable or unplaceable).
+    # With `tz`, naive values are local to it and everything is returned in UTC; without,
+    # naive values keep their wall-clock time and offset-aware ones can't be placed (NaN).
+    out = np.full(len(ts), np.nan)
+    for i, v in enumerate(ts):
+        try:
+            t = pd.Timestamp(v)
+        except (TypeError, ValueError):
+            continue
+        if pd.isna(t):
+            continue
+        if tz:
+            if t.tzinfo is None:
+                t = t.tz_localize(tz, ambiguous="NaT", nonexistent="NaT")
+                if pd.isna(t):
+                    continue
+            t = t.tz_convert("UTC").tz_localize(None)
+        elif t.tzinfo is not None:
+            continue
+        out[i] = (t - _EPOCH) / pd.Timedelta(hours=1)
+    return out
+
+# --- providers -------------------------------------------------------------
+# A provider returns {"time": [iso hour, ...], "wind_mph": [...], "precip_mm": [...]}
+# for a course over [start, end], optionally with the "timezone" its naive times are in,
+# and an empty "time" list when it has nothing for the course. Register new ones (e.g. an HTTP API using
+# WEATHER_API_KEY) in PROVIDERS. Remote providers set `remote = True` so their grids
+# are cached on disk; local ones are re-read whenever their `stamp()` changes.
+
+class StubProvider:
+    name = "stub"
+    remote = False
+
+    def __init__(self, wind_mph: float = 0.0, precip_mm: float = 0.0, **_):
+        self.wind_mph = float(wind_mph); self.precip_mm = float(precip_mm)
+
+    def stamp(self, course: str):
+        return (self.wind_mph, self.precip_mm)
+
+    def fetch(self, course: str, lat, lon, start: str, end: str) -> dict:
+        hours = pd.date_range(start, pd.Timestamp(end) + pd.Timedelta(hours=23), freq="h")
+        return {"time": [h.isoformat() for h in hours],
+                "wind_mph": [self.wind_mph] * len(hours),
+                "precip_mm": [self.precip_mm] * len(hours)}
+
+class FileProvider:
+    # Reads <dir>/<course slug>.json with the grid layout above
+    name = "file"
+    remote = False
+
+    def __init__(self, dir: str = "data/weather", **_):
+        self.dir = Path(dir)
+
+    def stamp(self, course: str):
+        fp = self.dir / f"{_slug(course)}.json"
+        return fp.stat().st_mtime if fp.exists() else None
+
+    def fetch(self, course: str, lat, lon, start: str, end: str) -> dict:
+        fp = self.dir / f"{_slug(course)}.json"
+        if not fp.exists():
+            return {"time": [], **{g: [] for g in GRID_KEYS}}
+        with open(fp, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        times = [str(x) for x in raw.get("time") or []]
+        keep = [start <= x[:10] <= end for x in times]
+        out = {"time": [x for x, k in zip(times, keep) if k],
+               **{g: [float(v) for v, k in zip(raw.get(g) or [0.0] * len(times), keep) if k] for g in GRID_KEYS}}
+        if raw.get("timezone"):
+            out["timezone"] = raw["timezone"]
+        return out
+
+PROVIDERS = {"stub": StubProvider, "file": FileProvider}
+
+def get_provider(wcfg: dict):
+    name = str(wcfg.get("provider", "file"))
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown weather provider: {name}")
+    return PROVIDERS[name](**dict(wcfg.get("provider_options", {}) or {}))
+
+# --- forecast grids --------------------------------------------------------
+
+_GRIDS: dict[tuple, tuple[float, dict]] = {}
+
+def forecast_grid(provider, course: str, lat, lon, start: str, end: str, ttl_seconds: int = 3 * 3600,
+                  tz: str | None = None) -> dict:
+    # Time-indexed grid {"t": hours since epoch, "wind_mph": ..., "precip_mm": ..., "tz": ...}.
+    # "tz" is the course timezone used (`tz`, else the provider's); pass it on to tee_times.
+    # Memoized in-process per course/window; remote providers are also cached under
+    # data/index/weather so reruns and other processes reuse them until the TTL.
+    remote = getattr(provider, "remote", True)
+    stamp = None if remote else provider.stamp(course)
+    key = (provider.name, _slug(course), start, end, stamp, tz)
+    hit = _GRIDS.get(key)
+    if hit and time.time() - hit[0] <= ttl_seconds:
+        return hit[1]
+
+    params = {"course": _slug(course), "lat": lat, "lon": lon, "start": start, "end": end}
+    ok, raw = cache_read("weather", provider.name, params, ttl_seconds, root=CACHE_DIR) if remote else (False, None)
+    if ok:
+        log(f"Weather cache hit: {course} {start}..{end}")
+    else:
+        raw = provider.fetch(course, lat, lon, start, end)
+        if remote:
+            cache_write("weather", provider.name, params, raw, root=CACHE_DIR)
+        log(f"Weather fetched ({provider.name}): {course} {start}..{end}")
+
+    src_tz = _zone(raw.get("timezone"))
+    t = _hours(raw.get("time") or [], src_tz or tz)
+    order = np.argsort(t)[:int(np.isfinite(t).sum())]
+    grid = {"t": t[order], "tz": tz or src_tz}
+    for g in GRID_KEYS:
+        grid[g] = np.asarray(raw.get(g) or np.zeros(len(t)), dtype=float)[order]
+    _GRIDS[key] = (time.time(), grid)
+    return grid
+
+def event_window(start_date: str, days: int = 4) -> tuple[str, str]:
+    d = date.fromisoformat(str(start_date)[:10])
+    return d.isoformat(), (d + timedelta(days=days - 1)).isoformat()
+
+# --- tee times -------------------------------------------------------------
+
+def tee_times(field_updates: dict | None, start_date: str, rounds: tuple[int, ...] = (1, 2),
+              tz: str | None = None) -> pd.DataFrame:
+    # [name_norm, R1_TEE, R2_TEE] in hours since epoch from a field-updates payload.
+    # Accepts flat r{n}_teetime keys or a teetimes list of {round_num, teetime}.
+    cols = [f"R{r}_TEE" for r in rounds]
+    players = []
+    if isinstance(field_updates, dict):
+        players = field_updates.get("field") or field_updates.get("players") or []
+    d0 = date.fromisoformat(str(start_date)[:10])
+    rows = []
+    for p in players:
+        name = p.get("player_name") or p.get("name") or ""
+        if not name:
+            continue
+        times = {r: p.get(f"r{r}_teetime") for r in rounds}
+        for t in p.get("teetimes") or []:
+            if isinstance(t, dict) and t.get("round_num") in times and t.get("teetime"):
+                times[t["round_num"]] = t["teetime"]
+        row = {"name_norm": norm_name(name)}
+        for r in rounds:
+            v = str(times[r] or "")
+            # clock-only values ("7:45am") are anchored to that round's date
+            row[f"R{r}_TEE"] = f"{d0 + timedelta(days=r - 1)} {v}" if v and not re.match(r"\d{4}-", v) else v
+        rows.append(row)
+    df = pd.DataFrame(rows, columns=["name_norm"] + cols)
+    for c in cols:
+        df[c] = _hours(df[c].where(df[c] != "", None).tolist(), tz)
+    return df
+
+# --- adjustment ------------------------------------------------------------
+
+def exposure(tees: np.ndarray, grid: dict, round_hours: float = 4.5, step: float = 0.5) -> tuple[np.ndarray, np.ndarray]:
+    # tees: (players, rounds) tee hours. Returns mean wind (mph) and rain (mm) per round
+    # played, via one interpolation over every player/round/sample point.
+    offs = np.arange(0.0, round_hours + 1e-9, step)
+    pts = tees[..., None] + offs                        # (players, rounds, samples)
+    wind = np.interp(pts.ravel(), grid["t"], grid["wind_mph"]).reshape(pts.shape).mean(axis=2)
+    rain = np.interp(pts.ravel(), grid["t"], grid["precip_mm"]).reshape(pts.shape).mean(axis=2) * round_hours
+    missing = np.isnan(tees)
+    wind[missing] = np.nan; rain[missing] = np.nan
+    with np.errstate(invalid="ignore"):
+        n = (~missing).sum(axis=1)
+        w = np.where(n > 0, np.nansum(wind, axis=1) / np.maximum(n, 1), np.nan)
+        r = np.where(n > 0, np.nansum(rain, axis=1) / np.maximum(n, 1), np.nan)
+    return w, r
+
+def weather_adjustment(df: pd.DataFrame, cap_abs: float = 0.12, grid: dict | None = None, tees: pd.DataFrame | None = None,
+                       wind_strokes_per_mph: float = 0.04, rain_strokes_per_mm: float = 0.05,
+                       round_hours: float = 4.5) -> pd.Series:
+    # Field-relative: players whose waves draw more wind/rain than the field average lose strokes.
+    # No grid or tee times -> zeros, so the overlay stays deterministic and bounded.
     adj = pd.Series(np.zeros(len(df)), index=df.index, name="WEATHER_ADJ")
+    if grid is None or tees is None or tees.empty or not len(grid["t"]):
+        return adj
+    cols = [c for c in tees.columns if c.endswith("_TEE")]
+    T = df[["name_norm"]].merge(tees, on="name_norm", how="left")[cols].to_numpy(dtype=float)
+    wind, rain = exposure(T, grid, round_hours=round_hours)
+    has = ~np.isnan(wind)
+    if not has.any():
+        return adj
+    strokes = -(wind_strokes_per_mph * (wind - wind[has].mean()) + rain_strokes_per_mm * (rain - rain[has].mean()))
+    adj[:] = np.where(has, strokes, 0.0)
     return adj.clip(lower=-abs(cap_abs), upper=abs(cap_abs))
@@ -13,10 +13,10 @@ def _key(source: str, endpoint: str, params: dict) -> str:
     base = f"{source}|{endpoint}|{items}"
     return hashlib.sha256(base.encode("utf-8")).hexdigest()
 
-def cache_read(source: str, endpoint: str, params: dict, ttl_seconds: int) -> tuple[bool, Any]:
-    RAW_DIR.mkdir(parents=True, exist_ok=True)
+def cache_read(source: str, endpoint: str, params: dict, ttl_seconds: int, root: Path = RAW_DIR) -> tuple[bool, Any]:
+    root.mkdir(parents=True, exist_ok=True)
     k = _key(source, endpoint, params)
-    fp = RAW_DIR / f"{source}_{k}.json"
+    fp = root / f"{source}_{k}.json"
     if not fp.exists():
         return False, None
     age = time.time() - fp.stat().st_mtime
@@ -25,9 +25,24 @@ def cache_read(source: str, endpoint: str, params: dict, ttl_seconds: int) -> tu
     with open(fp, "r", encoding="utf-8") as f:
         return True, json.load(f)
 
-def cache_write(source: str, endpoint: str, params: dict, payload: Any) -> None:
-    RAW_DIR.mkdir(parents=True, exist_ok=True)
+def cache_write(source: str, endpoint: str, params: dict, payload: Any, root: Path = RAW_DIR) -> None:
+    root.mkdir(parents=True, exist_ok=True)
     k = _key(source, endpoint, params)
-    fp = RAW_DIR / f"{source}_{k}.json"
+    fp = root / f"{source}_{k}.json"
     with open(fp, "w", encoding="utf-8") as f:
         json.dump(payload, f)
+
+def scan_raw(source: str, seen: dict[str, float]):
+    # Yield (filename, mtime, payload) for cached responses that are new or changed
+    # since `seen` ({filename: mtime}); lets local indexes update incrementally.
+    RAW_DIR.mkdir(parents=True, exist_ok=True)
+    for fp in sorted(RAW_DIR.glob(f"{source}_*.json")):
+        mtime = fp.stat().st_mtime
+        if seen.get(fp.name) == mtime:
+            continue
+        try:
+            with open(fp, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            continue
+        yield fp.name, mtime, payload
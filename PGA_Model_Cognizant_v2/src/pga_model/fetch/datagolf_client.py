@@ -1,27 +1,37 @@
 from __future__ import annotations
 import os
 import time
-import requests
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, Mapping
 
-from ..report.logging import load_yaml, log
+from ..report.logging import log
 from .cache import cache_read, cache_write
 
 class DataGolfError(RuntimeError):
     pass
 
-def _cfg() -> dict:
-    return load_yaml("config/datagolf.yaml")
+@lru_cache(maxsize=1)
+def _cfg() -> Mapping:
+    # Fallback for callers that don't pass a config; loaded and validated once per process
+    from ..config import load_config
+    return load_config().datagolf
 
 def _ttl(endpoint_key: str) -> int:
     # conservative defaults for pre-tournament
     # skill/decomps/approach: 6h; schedule: 24h
     if endpoint_key in {"schedule"}:
         return 24 * 3600
+    # tee times move around until the event starts
+    if endpoint_key in {"field_updates"}:
+        return 1 * 3600
+    # completed-event rounds never change; keep them for the course-history store
+    if endpoint_key in {"historical_rounds"}:
+        return 365 * 24 * 3600
     return 6 * 3600
 
-def _req(endpoint_key: str, params: dict | None = None, *, attempts: int = 3, timeout: int = 30) -> Dict[str, Any]:
-    cfg = _cfg()
+def _req(endpoint_key: str, params: dict | None = None, *, attempts: int = 3, timeout: int = 30,
+         dg_cfg: Mapping | None = None) -> Dict[str, Any]:
+    cfg = dg_cfg if dg_cfg is not None else _cfg()
     base = str(cfg.get("base_url", "")).rstrip("/")
     eps = cfg.get("endpoints", {}) or {}
     if endpoint_key not in eps:
@@ -44,6 +54,8 @@ def _req(endpoint_key: str, params: dict | None = None, *, attempts: int = 3, ti
         log(f"DataGolf cache hit: {endpoint_key}")
         return payload
 
+    import requests  # deferred: fully cached runs never touch the network stack
+
     url = f"{base}{endpoint}"
     headers = {"User-Agent": "pga-model-v2 (+local)"}
 
@@ -68,18 +80,26 @@ def _req(endpoint_key: str, params: dict | None = None, *, attempts: int = 3, ti
 
     raise DataGolfError(last_err or "Unknown DataGolf request failure")
 
-def fetch_schedule(tour: str = "pga", upcoming_only: bool = True) -> dict:
-    return _req("schedule", {"tour": tour, "upcoming_only": "yes" if upcoming_only else "no"})
+def fetch_schedule(tour: str = "pga", upcoming_only: bool = True, dg_cfg: Mapping | None = None) -> dict:
+    return _req("schedule", {"tour": tour, "upcoming_only": "yes" if upcoming_only else "no"}, dg_cfg=dg_cfg)
+
+def fetch_skill_ratings(tour: str = "pga", display: str = "value", dg_cfg: Mapping | None = None) -> dict:
+    return _req("skill_ratings", {"tour": tour, "display": display}, dg_cfg=dg_cfg)
+
+def fetch_player_decomp(tour: str = "pga", dg_cfg: Mapping | None = None) -> dict:
+    return _req("player_decomp", {"tour": tour}, dg_cfg=dg_cfg)
 
-def fetch_skill_ratings(tour: str = "pga", display: str = "value") -> dict:
-    return _req("skill_ratings", {"tour": tour, "display": display})
+def fetch_approach_skill(tour: str = "pga", period: str = "l24", dg_cfg: Mapping | None = None) -> dict:
+    return _req("approach_skill", {"tour": tour, "period": period}, dg_cfg=dg_cfg)
 
-def fetch_player_decomp(tour: str = "pga") -> dict:
-    return _req("player_decomp", {"tour": tour})
 
-def fetch_approach_skill(tour: str = "pga", period: str = "l24") -> dict:
-    return _req("approach_skill", {"tour": tour, "period": period})
+def fetch_pre_tournament(event_id: int, tour: str = "pga", dg_cfg: Mapping | None = None) -> dict:
+    return _req("pre_tournament", {"tour": tour, "event_id": int(event_id), "odds_format": "percent"}, dg_cfg=dg_cfg)
 
+def fetch_field_updates(tour: str = "pga", dg_cfg: Mapping | None = None) -> dict:
+    # Current field with tee times (feeds the weather wave overlay)
+    return _req("field_updates", {"tour": tour}, dg_cfg=dg_cfg)
 
-def fetch_pre_tournament(event_id: int, tour: str = "pga") -> dict:
-    return _req("pre_tournament", {"tour": tour, "event_id": int(event_id), "odds_format": "percent"})
+def fetch_historical_rounds(event_id: int, year: int, tour: str = "pga", dg_cfg: Mapping | None = None) -> dict:
+    # Round-level scores/SG for a completed event; cached payloads feed the course-history store
+    return _req("historical_rounds", {"tour": tour, "event_id": int(event_id), "year": int(year)}, dg_cfg=dg_cfg)
@@ -1,10 +1,12 @@
 from __future__ import annotations
+from typing import Mapping
+
 from ..report.logging import log
 from .datagolf_client import fetch_schedule, fetch_pre_tournament
 
-def resolve_event(tour: str = "pga") -> dict:
+def resolve_event(tour: str = "pga", dg_cfg: Mapping | None = None) -> dict:
     # choose next upcoming event from schedule then fetch pre-tournament to get field list
-    sched = fetch_schedule(tour=tour, upcoming_only=True)
+    sched = fetch_schedule(tour=tour, upcoming_only=True, dg_cfg=dg_cfg)
     events = sched.get("schedule") or sched.get("events") or sched.get("tournaments") or []
     if not events:
         raise RuntimeError("No upcoming events returned by DataGolf schedule endpoint")
@@ -21,7 +23,7 @@ def resolve_event(tour: str = "pga") -> dict:
 
     log(f"Resolved event_id={event_id} ({event_name})")
 
-    pret = fetch_pre_tournament(event_id=int(event_id), tour=tour)
+    pret = fetch_pre_tournament(event_id=int(event_id), tour=tour, dg_cfg=dg_cfg)
     players = pret.get("field") or pret.get("players") or pret.get("data") or []
     # normalize
     field=[]
@@ -29,13 +31,28 @@ def resolve_event(tour: str = "pga") -> dict:
         name = p.get("player_name") or p.get("name") or p.get("player") or ""
         if not name: 
             continue
-        field.append({"Player": name})
+        field.append({"Player": name, "dg_id": p.get("dg_id")})
 
     return {
         "event_id": int(event_id),
         "event_name": event_name,
         "course": course,
         "date": date,
+        "latitude": ev.get("latitude"),
+        "longitude": ev.get("longitude"),
         "players": field,
         "field_count": len(field),
     }
+
+def matches_event(payload: dict | None, ev: dict) -> bool:
+    # True only if a current-event payload (e.g. field-updates) is for the resolved event
+    if not isinstance(payload, dict):
+        return False
+    pid = payload.get("event_id") or payload.get("dg_event_id")
+    if pid is not None:
+        try:
+            return int(pid) == int(ev["event_id"])
+        except (TypeError, ValueError):
+            return False
+    name = str(payload.get("event_name") or "").strip().lower()
+    return bool(name) and name == str(ev.get("event_name") or "").strip().lower()
@@ -1,74 +1,192 @@
 from __future__ import annotations
 import argparse
 from pathlib import Path
-import pandas as pd
-
-from .report.logging import load_yaml, log, write_json, ensure_dir
-from .fetch.field_resolver import resolve_event
-from .fetch.datagolf_client import fetch_skill_ratings, fetch_player_decomp, fetch_approach_skill
-from .features.build_features import build_features
-from .features.weather import weather_adjustment
-from .sim.simulate import compute_composite, simulate
-from .report.calibration import calibration_report
-from .report.writer import write_outputs
+from typing import TYPE_CHECKING
+
+from .config import Config, load_config, thaw
+from .report.logging import log, write_json, ensure_dir
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Heavy modules (pandas/numpy/requests/yaml) are imported inside the stages that
+# use them so `--help` and startup stay cheap; see bench/import_time.py.
+
+def load_inputs(cfg: Config) -> dict:
+    # Fetch stage: event + raw DataGolf payloads (served from data/raw when fresh)
+    from .fetch.field_resolver import resolve_event, matches_event
+    from .fetch.datagolf_client import (fetch_skill_ratings, fetch_player_decomp, fetch_approach_skill, fetch_field_updates,
+                                        fetch_historical_rounds, DataGolfError)
+
+    dg = cfg.datagolf
+    ev = resolve_event(dg_cfg=dg)
+    log(f"Event: {ev['event_name']} | Course: {ev['course']} | Field: {ev['field_count']}")
+
+    skill_l24 = fetch_skill_ratings(dg_cfg=dg)
+    # DataGolf doesn't expose true last-8 rounds here; we keep the L24/L8 blend interface.
+    # If you later add a dedicated form endpoint, wire it into skill_l8.
+    skill_l8 = None
+
+    decomp = fetch_player_decomp(dg_cfg=dg)
+
+    approach_l24 = fetch_approach_skill(period="l24", dg_cfg=dg)
+    approach_l12 = fetch_approach_skill(period="l12", dg_cfg=dg)
+
+    # Past editions of this event feed the course-history store (scanned from data/raw).
+    # Seasons already in the store or fetched before are skipped; misses are remembered
+    # for a while, so cached runs and serve refreshes don't re-request them.
+    chc = cfg.model.get("course_history", {}) or {}
+    if chc.get("enabled", True) and ev.get("date"):
+        from .features.course_history import RoundStore
+        store = RoundStore.load()
+        year = int(str(ev["date"])[:4])
+        todo = store.seasons_to_fetch(ev["event_id"], ev["course"], range(year - int(chc.get("seasons", 5)), year))
+        for y in todo:
+            try:
+                fetch_historical_rounds(event_id=ev["event_id"], year=y, dg_cfg=dg)
+                store.mark_season(ev["event_id"], y, ok=True)
+            except DataGolfError as e:
+                store.mark_season(ev["event_id"], y, ok=False)
+                log(f"Course history: no rounds for event {ev['event_id']} in {y} ({e})")
+        if todo:
+            store.save()
+
+    # Tee times only feed the weather overlay; a failure here shouldn't stop the run
+    field_updates = None
+    if (cfg.model.get("weather", {}) or {}).get("enabled", False):
+        try:
+            field_updates = fetch_field_updates(dg_cfg=dg)
+        except DataGolfError as e:
+            log(f"Weather: no tee times ({e})")
+        # field-updates always describes DataGolf's current event; only use it for ours
+        if field_updates is not None and not matches_event(field_updates, ev):
+            log(f"Weather: field-updates is for '{field_updates.get('event_name')}', not {ev['event_name']}; ignoring tee times")
+            field_updates = None
+
+    return {
+        "event": ev,
+        "skill_l24": skill_l24,
+        "skill_l8": skill_l8,
+        "decomp": decomp,
+        "approach_l24": approach_l24,
+        "approach_l12": approach_l12,
+        "field_updates": field_updates,
+    }
+
+def build_table(inputs: dict, cfg: Config) -> tuple[pd.DataFrame, pd.Series]:
+    # Feature stage: model table + bounded weather overlay
+    from .features.build_features import build_features
+    from .features.weather import weather_adjustment, forecast_grid, get_provider, event_window, tee_times, course_timezone
+    from .features.similar_courses import update_course_index, course_profile, event_key
+    from .features.course_history import update_history_store
+
+    model = cfg.model
+    sc = model.get("similar_courses", {}) or {}
+    demand = None
+    if sc.get("enabled", True):
+        index = update_course_index(inputs["skill_l24"], inputs["approach_l24"] or inputs["approach_l12"])
+        demand = course_profile(index, inputs["event"]["course"], ridge=float(sc.get("ridge", 0.1)),
+                                exclude=event_key(inputs["decomp"]))
+        if demand is None:
+            log(f"Course fit: no past events indexed for '{inputs['event']['course']}'")
+
+    history = update_history_store() if (model.get("course_history", {}) or {}).get("enabled", True) else None
+
+    df = build_features(
+        players=inputs["event"]["players"],
+        skill_l24=inputs["skill_l24"],
+        skill_l8=inputs["skill_l8"],
+        decomp=inputs["decomp"],
+        approach_l24=inputs["approach_l24"],
+        approach_l12=inputs["approach_l12"],
+        cfg=model,
+        course_demand=demand,
+        history=history,
+        course=inputs["event"]["course"],
+        as_of=inputs["event"]["date"]
+    )
+
+    ev = inputs["event"]
+    wcfg = model.get("weather", {}) or {}
+    cap_abs = float(model["projection"]["approach"].get("weather_cap_abs", 0.12))
+    weather_adj = weather_adjustment(df, cap_abs=cap_abs)
+    if wcfg.get("enabled", False) and inputs.get("field_updates") and ev.get("date"):
+        # weather is optional: a provider/IO failure leaves the adjustment at zero
+        try:
+            start, end = event_window(ev["date"])
+            grid = forecast_grid(get_provider(wcfg), ev["course"], ev.get("latitude"), ev.get("longitude"), start, end,
+                                 ttl_seconds=int(float(wcfg.get("ttl_hours", 3)) * 3600),
+                                 tz=course_timezone(wcfg, ev["course"]))
+        except (OSError, ValueError) as e:
+            grid = None
+            log(f"Weather: adjustment disabled for this run ({e})")
+        if grid is not None and not len(grid["t"]):
+            log(f"Weather: no forecast grid for '{ev['course']}'; adjustment is 0")
+        elif grid is not None:
+            if not grid["tz"]:
+                log(f"Weather: no timezone for '{ev['course']}' (weather.timezones); only naive stamps are used")
+            weather_adj = weather_adjustment(
+                df,
+                cap_abs=cap_abs,
+                grid=grid,
+                tees=tee_times(inputs["field_updates"], ev["date"], tz=grid["tz"]),
+                wind_strokes_per_mph=float(wcfg.get("wind_strokes_per_mph", 0.04)),
+                rain_strokes_per_mm=float(wcfg.get("rain_strokes_per_mm", 0.05)),
+                round_hours=float(wcfg.get("round_hours", 4.5)),
+            )
+    return df, weather_adj
+
+def run_sim(df: pd.DataFrame, weather_adj: pd.Series, cfg: Config, normals=None) -> pd.DataFrame:
+    # Sim stage: composite from projection weights, then Monte Carlo finish probabilities
+    from .sim.simulate import compute_composite, simulate
+
+    sim = cfg.model["sim"]
+    comp = compute_composite(df, cfg.model["projection"]["weights"])
+    return simulate(
+        df=df,
+        comp=comp,
+        n_sims=int(sim["n_sims"]),
+        seed=int(sim["seed"]),
+        variance_multiplier=float(sim.get("variance_multiplier", 1.0)),
+        weather_adj=weather_adj,
+        normals=normals
+    )
 
 def cli() -> int:
     ap = argparse.ArgumentParser()
-    ap.add_argument("--mode", default="pretournament", choices=["pretournament"])
+    ap.add_argument("--mode", default="pretournament", choices=["pretournament", "serve"])
     ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--host", default="127.0.0.1", help="serve mode: bind address")
+    ap.add_argument("--port", type=int, default=8765, help="serve mode: port")
     args = ap.parse_args()
 
-    cfg = load_yaml("config/model.yaml")
+    cfg = load_config()
     if args.seed is not None:
-        cfg.setdefault("sim", {})["seed"] = int(args.seed)
+        cfg = cfg.with_overrides({"sim": {"seed": int(args.seed)}})
+
+    if args.mode == "serve":
+        from .serve import serve
+        return serve(cfg, host=args.host, port=args.port)
 
     ensure_dir("out")
     Path("out/run.log").write_text("", encoding="utf-8")
     log("PGA_Model_Cognizant_v2 starting (pretournament)")
 
     try:
-        ev = resolve_event()
-        log(f"Event: {ev['event_name']} | Course: {ev['course']} | Field: {ev['field_count']}")
-
-        skill_l24 = fetch_skill_ratings()
-        # DataGolf doesn't expose true last-8 rounds here; we keep the L24/L8 blend interface.
-        # If you later add a dedicated form endpoint, wire it into skill_l8.
-        skill_l8 = None
-
-        decomp = fetch_player_decomp()
-
-        approach_l24 = fetch_approach_skill(period="l24")
-        approach_l12 = fetch_approach_skill(period="l12")
-
-        df = build_features(
-            players=ev["players"],
-            skill_l24=skill_l24,
-            skill_l8=skill_l8,
-            decomp=decomp,
-            approach_l24=approach_l24,
-            approach_l12=approach_l12,
-            cfg=cfg
-        )
-
-        weather_adj = weather_adjustment(df, cap_abs=float(cfg["projection"]["approach"].get("weather_cap_abs", 0.12)))
-
-        proj_weights = cfg["projection"]["weights"]
-        comp = compute_composite(df, proj_weights)
-
-        out_df = simulate(
-            df=df,
-            comp=comp,
-            n_sims=int(cfg["sim"]["n_sims"]),
-            seed=int(cfg["sim"]["seed"]),
-            variance_multiplier=float(cfg["sim"].get("variance_multiplier", 1.0)),
-            weather_adj=weather_adj
-        )
-
-        calib = calibration_report(out_df, cfg)
+        inputs = load_inputs(cfg)
+        ev = inputs["event"]
+
+        df, weather_adj = build_table(inputs, cfg)
+        out_df = run_sim(df, weather_adj, cfg)
+
+        from .report.calibration import calibration_report
+        from .report.writer import write_outputs
+
+        calib = calibration_report(out_df, cfg.model)
         summary = {
             "event": {k: ev.get(k) for k in ["event_id","event_name","course","date","field_count"]},
-            "sim": cfg["sim"],
-            "projection": cfg["projection"],
+            "sim": thaw(cfg.model["sim"]),
+            "projection": thaw(cfg.model["projection"]),
             "calibration_status": calib["status"],
         }
 
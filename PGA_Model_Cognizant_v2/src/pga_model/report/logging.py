@@ -3,7 +3,6 @@ from pathlib import Path
 import json
 import os
 from datetime import datetime, timezone
-import yaml
 
 LOG_PATH = Path("out/run.log")
 
@@ -16,6 +15,7 @@ def log(msg: str) -> None:
         f.write(f"[{now_utc_iso()}] {msg}\n")
 
 def load_yaml(path: str) -> dict:
+    import yaml  # deferred: only needed once at startup
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f) or {}
 
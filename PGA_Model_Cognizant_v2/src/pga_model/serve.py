@@ -0,0 +1,214 @@
+from __future__ import annotations
+import json
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .config import Config, thaw
+from .report.logging import log, now_utc_iso
+from .features.names import norm_name
+from .sim.simulate import draw_block
+from .report.calibration import calibration_report
+from .main import load_inputs, build_table, run_sim
+
+PROB_COLS = ["P_T10","P_T20","P_T30","P_T40","P_MC"]
+MAX_BLOCKS = 4
+GET_PATHS = {"/health"}
+
+class BadRequest(ValueError):
+    pass
+
+def _num(req: dict, key: str, kind=float, positive: bool = False):
+    v = req.get(key)
+    if v is None:
+        return None
+    if isinstance(v, bool) or not isinstance(v, (int, float)) or (kind is int and float(v) != int(v)):
+        raise BadRequest(f"'{key}' must be {'an integer' if kind is int else 'a number'}")
+    if positive and v <= 0:
+        raise BadRequest(f"'{key}' must be > 0")
+    return kind(v)
+
+def _str_list(req: dict, key: str) -> list[str] | None:
+    v = req.get(key)
+    if v is None:
+        return None
+    if not isinstance(v, list) or not all(isinstance(x, str) for x in v):
+        raise BadRequest(f"'{key}' must be a list of strings")
+    return v
+
+def _validate(req: dict, weights: Mapping) -> dict:
+    # Clean request body for /simulate and /probs; BadRequest -> HTTP 400.
+    # `weights` are the configured projection weights; overrides may only reweight those.
+    out = {"seed": _num(req, "seed", int), "n_sims": _num(req, "n_sims", int, positive=True),
+           "variance_multiplier": _num(req, "variance_multiplier", positive=True),
+           "players": _str_list(req, "players"), "cols": _str_list(req, "cols"), "weights": None}
+    w = req.get("weights")
+    if w is not None:
+        if not isinstance(w, dict):
+            raise BadRequest("'weights' must be an object of {feature: number}")
+        for k, v in w.items():
+            if k not in weights:
+                raise BadRequest(f"Unknown weight '{k}' (expected one of: {', '.join(weights)})")
+            if v is None:
+                raise BadRequest(f"'{k}' must be a number")
+        out["weights"] = {k: _num(w, k) for k in w}
+    return out
+
+class ModelState:
+    # Warm state for the local daemon: parsed payloads, the feature table and
+    # standard-normal draw blocks, so re-simulations only redo composite + ranking.
+
+    def __init__(self, cfg: Config):
+        self.base_cfg = cfg
+        self.inputs: dict | None = None
+        self.df: pd.DataFrame | None = None
+        self.weather_adj: pd.Series | None = None
+        self.blocks: dict[tuple[int, int, int], np.ndarray] = {}
+        self.last: pd.DataFrame | None = None
+        self.loaded_at: str | None = None
+
+    def refresh(self) -> dict:
+        timing = {}
+        t0 = time.perf_counter()
+        inputs = load_inputs(self.base_cfg)
+        timing["load_ms"] = _ms(t0)
+
+        t1 = time.perf_counter()
+        df, weather_adj = build_table(inputs, self.base_cfg)
+        timing["features_ms"] = _ms(t1)
+
+        # swap only once both stages succeeded, so a failed refresh keeps the old state whole
+        self.inputs, self.df, self.weather_adj = inputs, df, weather_adj
+        self.blocks.clear()
+        self.last = None
+        self.loaded_at = now_utc_iso()
+        log(f"serve: refreshed ({len(self.df)} players)")
+        return timing
+
+    def _cfg_for(self, req: dict) -> Config:
+        sim = {k: req[k] for k in ["seed","n_sims","variance_multiplier"] if req.get(k) is not None}
+        overrides = {"sim": sim}
+        if req.get("weights"):
+            overrides["projection"] = {"weights": req["weights"]}
+        return self.base_cfg.with_overrides(overrides)
+
+    def _block(self, n_sims: int, n: int, seed: int) -> np.ndarray:
+        key = (n_sims, n, seed)
+        if key not in self.blocks:
+            if len(self.blocks) >= MAX_BLOCKS:
+                self.blocks.pop(next(iter(self.blocks)))
+            self.blocks[key] = draw_block(n_sims, n, seed)
+        return self.blocks[key]
+
+    def simulate(self, req: dict) -> tuple[pd.DataFrame, Config, dict]:
+        cfg = self._cfg_for(req)
+        n_sims = int(cfg.model["sim"]["n_sims"])
+        seed = int(cfg.model["sim"]["seed"])
+        normals = self._block(n_sims, len(self.df), seed)
+        out = run_sim(self.df, self.weather_adj, cfg, normals=normals)
+        self.last = out
+        return out, cfg, calibration_report(out, cfg.model)
+
+    def lookup(self, out: pd.DataFrame, players: list[str] | None, cols: list[str]) -> list[dict]:
+        view = out
+        if players:
+            wanted = [norm_name(p) for p in players]
+            view = out[out["name_norm"].isin(wanted)]
+        rows = view[["Player"] + cols].to_dict(orient="records")
+        return [{k: _jsonable(v) for k, v in r.items()} for r in rows]
+
+def _ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000.0, 3)
+
+def _jsonable(v: Any) -> Any:
+    if isinstance(v, (np.floating, float)):
+        return None if np.isnan(v) else float(v)
+    if isinstance(v, np.integer):
+        return int(v)
+    return v
+
+def handle(state: ModelState, path: str, req: dict) -> tuple[int, dict]:
+    t0 = time.perf_counter()
+    try:
+        req = _validate(req, state.base_cfg.model["projection"]["weights"])
+    except BadRequest as e:
+        return 400, {"status": "error", "error": str(e)}
+    if path == "/health":
+        body = {"status": "ok", "loaded_at": state.loaded_at,
+                "n_players": 0 if state.df is None else len(state.df),
+                "draw_blocks": [list(k) for k in state.blocks]}
+    elif path == "/refresh":
+        body = {"status": "ok", "timing": state.refresh()}
+    elif path == "/simulate":
+        out, cfg, calib = state.simulate(req)
+        cols = ["MODEL_SCORE"] + PROB_COLS
+        body = {"status": "ok", "sim": thaw(cfg.model["sim"]), "weights": thaw(cfg.model["projection"]["weights"]),
+                "calibration": calib, "players": state.lookup(out, req.get("players"), cols)}
+    elif path == "/probs":
+        # Answer from the last simulation; run with defaults if nothing has been simulated yet
+        out = state.last if state.last is not None else state.simulate({})[0]
+        cols = [c for c in (req.get("cols") or PROB_COLS) if c in out.columns]
+        body = {"status": "ok", "players": state.lookup(out, req.get("players"), cols)}
+    else:
+        return 404, {"status": "error", "error": f"Unknown path: {path}"}
+    body.setdefault("timing", {})["total_ms"] = _ms(t0)
+    return 200, body
+
+def _handler(state: ModelState):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _dispatch(self, req: dict) -> None:
+            try:
+                code, body = handle(state, self.path.split("?")[0].rstrip("/") or "/", req)
+            except Exception as e:
+                log(f"serve: error on {self.path}: {e}")
+                code, body = 500, {"status": "error", "error": str(e)}
+            self._send(code, body)
+
+        def do_GET(self):
+            # GET is read-only; /refresh, /simulate and /probs are POST
+            if self.path.split("?")[0].rstrip("/") not in GET_PATHS:
+                self._send(405, {"status": "error", "error": "Use POST for this path"})
+                return
+            self._dispatch({})
+
+        def do_POST(self):
+            n = int(self.headers.get("Content-Length") or 0)
+            try:
+                req = json.loads(self.rfile.read(n) or b"{}")
+            except ValueError as e:
+                self._send(400, {"status": "error", "error": f"Bad JSON: {e}"})
+                return
+            if not isinstance(req, dict):
+                self._send(400, {"status": "error", "error": "Request body must be a JSON object"})
+                return
+            self._dispatch(req)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+def serve(cfg: Config, host: str = "127.0.0.1", port: int = 8765) -> int:
+    # Requests are handled one at a time, so the shared state needs no locking.
+    state = ModelState(cfg)
+    state.refresh()
+    httpd = HTTPServer((host, port), _handler(state))
+    log(f"serve: listening on http://{host}:{port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+    return 0
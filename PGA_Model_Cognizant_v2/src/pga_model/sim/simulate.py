@@ -31,8 +31,15 @@ def compute_composite(df: pd.DataFrame, proj_weights: dict) -> pd.Series:
         return pd.Series(np.zeros(len(df)), index=df.index)
     return comp / wsum
 
-def simulate(df: pd.DataFrame, comp: pd.Series, n_sims: int, seed: int, variance_multiplier: float=1.0, weather_adj: pd.Series|None=None):
+def draw_block(n_sims: int, n: int, seed: int) -> np.ndarray:
+    # Standard-normal block (n_sims x n). Scaling by sigma and shifting by mu
+    # reproduces rng.normal(loc=mu, scale=sig) exactly, so a block can be reused
+    # across re-simulations with different weights.
     rng = np.random.default_rng(seed)
+    return rng.standard_normal(size=(n_sims, n))
+
+def simulate(df: pd.DataFrame, comp: pd.Series, n_sims: int, seed: int, variance_multiplier: float=1.0, weather_adj: pd.Series|None=None,
+             normals: np.ndarray|None=None):
     n = len(df)
 
     # per-player sigma
@@ -54,19 +61,15 @@ def simulate(df: pd.DataFrame, comp: pd.Series, n_sims: int, seed: int, variance
     if weather_adj is not None:
         mu = mu + weather_adj.to_numpy(dtype=float)
 
-    draws = rng.normal(loc=mu, scale=sig, size=(n_sims, n))
+    if normals is None or normals.shape != (n_sims, n):
+        normals = draw_block(n_sims, n, seed)
+    draws = mu + sig * normals
     ranks = draws.argsort(axis=1)[:, ::-1]
 
     cutline = min(70, n-1)
     cuts = {"T10":10,"T20":20,"T30":30,"T40":40}
-    counts = {k: np.zeros(n, dtype=int) for k in cuts}
-    made = np.zeros(n, dtype=int)
-
-    for s in range(n_sims):
-        order = ranks[s]
-        for k,t in cuts.items():
-            counts[k][order[:t]] += 1
-        made[order[:cutline]] += 1
+    counts = {k: np.bincount(ranks[:, :t].ravel(), minlength=n) for k,t in cuts.items()}
+    made = np.bincount(ranks[:, :cutline].ravel(), minlength=n)
 
     out = df.copy()
     out["MODEL_SCORE"] = mu